@@ -8,9 +8,9 @@ This script provides a Streamlit web application for visualizing and analyzing c
 
 HOW TO RUN:
 -----------
-1. Ensure you have Python 3.7 or later installed.
+1. Ensure you have Python 3.8 or later installed.
 2. Install the required dependencies by running:
-   pip install streamlit pandas plotly
+   pip install "streamlit>=1.37" numpy pandas plotly pyarrow
 3. Place the dataset (`data_webapp.csv`) and logo image (`NF_HEA_GOVMT_logos.png`)
    in the respective folders: `Data UNFCCC/` and `Logos/`.
 4. Run the application using the command:
@@ -23,22 +23,102 @@ Project Directory
 │
 ├── satle_webapp.py                # This script
 ├── Data UNFCCC/                   # Folder containing the dataset
-│   └── data_webapp.csv
+│   ├── data_webapp.csv
+│   └── data_webapp.v2.parquet     # Columnar copy of the dataset, built on first run (not committed)
 ├── Logos/                         # Folder containing logo images
 │   └── NF_HEA_GOVMT_logos.png
 ├── .streamlit/                    # Hidden folder for Streamlit configuration
 │   └── config.toml                # Configuration file for Streamlit
+
+Chart Conventions:
+------------------
+- Reduce chart data on the server so the payload sent to the browser does not grow
+  with the dataset. Pie charts are capped with `top_k_with_other`; time-series
+  charts should be wrapped in `plotly_resampler.FigureResampler`, which sends only
+  a Largest-Triangle-Three-Buckets downsample of each trace.
+- Draw dense traces with WebGL rather than SVG: use `px.scatter(..., render_mode='webgl')`
+  or `go.Scattergl` instead of `go.Scatter` for any scatter or line chart.
 """
 
 # Import required libraries
+import math
+import os
+import tempfile
+
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import streamlit as st
 
-
+# Path to the dataset, used as the cache key for `load_data`
+DATA_PATH = "Data UNFCCC/data_webapp.csv"
+
+# Columns used by the application; everything else in the CSV is skipped on load
+DATA_COLUMNS = [
+    'organizationName',
+    'organizationType',
+    'country',
+    'region',
+    'dateactor',
+    'actorProperties_businessActivity',
+    'hasCommitments',
+    'hasInitiativeParticipations',
+    'hasActionsUndertaken',
+    'hasMitigations',
+    'hasAdaptations',
+    'hasRiskAssessments',
+    'hasClimateActionPlans',
+]
+
+# Filter columns stored as categoricals, so comparisons and counts work on integer codes
+CATEGORY_COLUMNS = ['organizationType', 'country', 'region']
+
+# Filter option standing for records with no value in a filter column
+MISSING_VALUE_LABEL = 'Not specified'
+
+# Version of the Parquet copy of the dataset; bump it whenever `load_data` changes
+# what it stores, so copies written by older code are ignored and rebuilt
+PARQUET_SCHEMA_VERSION = 2
+
+# Countries with fewer records than this are grouped as "Other countries" in the pie chart
+OTHER_COUNTRIES_THRESHOLD = 3000
+
+# Maximum number of named slices in a pie chart; the rest are grouped together
+PIE_CHART_MAX_SLICES = 15
+
+# Centered section heading shown above each pie chart
+CENTERED_HEADING_HTML = "<div style='text-align: center; font-size: 35px; font-weight: bold;'>{}</div>"
+
+# Number of filter selections for which counts and pie chart figures are kept in memory
+CHART_CACHE_ENTRIES = 64
+
+# Human-readable column names used in the final table
+TABLE_COLUMN_NAMES = {
+    'organizationName': 'Organization Name',
+    'organizationType': 'Actor',
+    'country': 'Country',
+    'region': 'Region',
+    'dateactor': 'Date',
+    'actorProperties_businessActivity': 'Business Activity',
+    'hasCommitments': 'Commitments',
+    'hasInitiativeParticipations': 'Initiative Participations',
+    'hasActionsUndertaken': 'Actions Undertaken',
+    'hasMitigations': 'Mitigations',
+    'hasAdaptations': 'Adaptations',
+    'hasRiskAssessments': 'Risk Assessments',
+    'hasClimateActionPlans': 'Climate Action Plans'
+}
+
+# Number of rows sent to the browser per page of the final table
+TABLE_PAGE_SIZE = 1000
+
+
+@st.cache_resource(show_spinner=False)
 def load_data(file_path):
     """
-    Load data from the given CSV file path.
+    Load data from the given CSV file path, or from its Parquet copy when up to date.
+
+    The DataFrame is cached and shared across sessions; callers must not modify it.
 
     Args:
         file_path (str): Path to the CSV file.
@@ -46,7 +126,197 @@ def load_data(file_path):
     Returns:
         DataFrame: Loaded data as a pandas DataFrame.
     """
-    return pd.read_csv(file_path)
+    # The Parquet copy is much faster to read than the CSV and keeps the categorical
+    # dtypes; it is rebuilt when the CSV is newer, unreadable or of another schema
+    parquet_path = f"{os.path.splitext(file_path)[0]}.v{PARQUET_SCHEMA_VERSION}.parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(file_path):
+        try:
+            df = pd.read_parquet(parquet_path, engine='pyarrow', columns=DATA_COLUMNS)
+        except (ImportError, OSError, KeyError, ValueError):
+            # Unreadable or truncated copy; rebuild it from the CSV below
+            df = None
+        if df is not None and list(df.columns) == DATA_COLUMNS and all(
+            isinstance(df[column].dtype, pd.CategoricalDtype) for column in CATEGORY_COLUMNS
+        ):
+            return df
+
+    # Only parse the columns in use, with the filter columns as categoricals
+    df = pd.read_csv(
+        file_path,
+        usecols=DATA_COLUMNS,
+        dtype={column: 'category' for column in CATEGORY_COLUMNS}
+    )
+    write_parquet_copy(df, parquet_path)
+
+    return df
+
+
+def write_parquet_copy(df, parquet_path):
+    """
+    Write the Parquet copy of the dataset used by `load_data`.
+
+    The file is written to a temporary path and then moved into place, so an
+    interrupted or concurrent write never leaves a truncated copy behind. Failures
+    are ignored: the copy is only a speed-up and the CSV keeps being used without it.
+
+    Args:
+        df (DataFrame): Loaded dataset.
+        parquet_path (str): Destination path of the Parquet copy.
+    """
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            suffix='.parquet.tmp', dir=os.path.dirname(parquet_path) or '.'
+        )
+        os.close(fd)
+        df.to_parquet(tmp_path, engine='pyarrow', index=False)
+        os.replace(tmp_path, parquet_path)
+    except (ImportError, OSError, ValueError):
+        pass
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@st.cache_data(show_spinner=False, max_entries=CHART_CACHE_ENTRIES)
+def count_values(_df_selection, selection):
+    """
+    Count the occurrences of each actor, country and region in the filtered dataset.
+
+    A single groupby over the three filter columns is computed and then reduced to
+    per-column tallies, instead of scanning the data once per column. The filtered
+    dataset is not hashed; the cache is keyed on the selection signature instead,
+    since identical filter states always produce identical counts.
+
+    Args:
+        _df_selection (DataFrame): Filtered dataset.
+        selection (tuple): Selection signature returned by `create_sidebar_filters`.
+
+    Returns:
+        tuple: Counts for actors, countries and regions, each a Series indexed by
+            value in descending order.
+    """
+    counts_3d = _df_selection.groupby(CATEGORY_COLUMNS, observed=True).size()
+
+    tallies = []
+    for level in range(len(CATEGORY_COLUMNS)):
+        counts = counts_3d.groupby(level=level, observed=True).sum().sort_values(ascending=False)
+        # Plain string labels, so charts can relabel values outside the categories
+        counts.index = counts.index.astype(object)
+        tallies.append(counts)
+
+    return tuple(tallies)
+
+
+@st.cache_data(show_spinner=False)
+def load_country_buckets(file_path):
+    """
+    Map each country to the label it is shown under in the countries pie chart.
+
+    Countries with fewer than `OTHER_COUNTRIES_THRESHOLD` records in the full
+    dataset are mapped to "Other countries". The mapping only depends on the
+    dataset, so it is computed once and cached.
+
+    Args:
+        file_path (str): Path to the CSV file.
+
+    Returns:
+        dict: Country name to chart label.
+    """
+    country_counts = load_data(file_path)['country'].value_counts()
+    return {
+        country: (country if count >= OTHER_COUNTRIES_THRESHOLD else 'Other countries')
+        for country, count in country_counts.items()
+    }
+
+
+@st.cache_data(show_spinner=False)
+def load_filter_options(file_path):
+    """
+    List the options of each sidebar filter.
+
+    Options are the categories of each filter column, followed by
+    `MISSING_VALUE_LABEL` when some records have no value in that column.
+
+    Args:
+        file_path (str): Path to the CSV file.
+
+    Returns:
+        dict: Filter column name to list of options.
+    """
+    df = load_data(file_path)
+    filter_options = {}
+    for column in CATEGORY_COLUMNS:
+        options = df[column].cat.categories.tolist()
+        if df[column].isna().any():
+            options.append(MISSING_VALUE_LABEL)
+        filter_options[column] = options
+    return filter_options
+
+
+def top_k_with_other(counts, k=PIE_CHART_MAX_SLICES, other_label='Other'):
+    """
+    Keep the `k` largest counts and sum the remainder into a single slice.
+
+    This bounds the number of slices sent to the browser regardless of the size
+    of the dataset.
+
+    Args:
+        counts (Series): Counts indexed by label.
+        k (int): Maximum number of labels kept as-is.
+        other_label (str): Label of the slice holding the remainder.
+
+    Returns:
+        Series: At most `k + 1` counts in descending order.
+    """
+    counts = counts.sort_values(ascending=False)
+    if len(counts) <= k:
+        return counts
+
+    top = counts.iloc[:k]
+    other = pd.Series({other_label: counts.iloc[k:].sum()})
+    # Merge with an existing slice of the same label (e.g. "Other countries"), which
+    # can move that slice up the order
+    merged = pd.concat([top, other]).groupby(level=0, sort=False).sum()
+    return merged.sort_values(ascending=False)
+
+
+@st.cache_resource(show_spinner=False, max_entries=3 * CHART_CACHE_ENTRIES)
+def build_pie_chart(counts):
+    """
+    Build a pie chart figure from aggregated counts.
+
+    Figures are cached on the counts themselves, so the figure is only rebuilt when
+    the aggregate changes. The cached figure is a single object shared by all
+    sessions; callers must not modify it in place.
+
+    Args:
+        counts (tuple): `(label, count)` pairs, one per slice.
+
+    Returns:
+        Figure: Plotly pie chart.
+    """
+    counts_df = pd.DataFrame(list(counts), columns=['Type', 'Count'])
+    return px.pie(counts_df, names='Type', values='Count')
+
+
+def count_categories(column):
+    """
+    Count the distinct non-missing values of a categorical column.
+
+    Equivalent to `nunique()`, but tallies the integer category codes with
+    `np.bincount` instead of hashing every value.
+
+    Args:
+        column (Series): Categorical column.
+
+    Returns:
+        int: Number of distinct values present.
+    """
+    codes = column.cat.codes.to_numpy()
+    # Missing values have code -1
+    counts = np.bincount(codes[codes >= 0], minlength=len(column.cat.categories))
+    return int((counts > 0).sum())
 
 
 def configure_page():
@@ -67,29 +337,63 @@ def create_sidebar_filters(df):
         df (DataFrame): The dataset.
 
     Returns:
-        DataFrame: Filtered dataset based on user selections.
+        tuple: Filtered dataset based on user selections, and the selection signature
+            (sorted tuples of the selected actors, countries and regions) used as a
+            cheap cache key for results derived from the filtered dataset.
     """
     st.sidebar.header("Searching Criteria")
 
+    filter_options = load_filter_options(DATA_PATH)
+    actor_options = filter_options["organizationType"]
+    country_options = filter_options["country"]
+    region_options = filter_options["region"]
+
     actor = st.sidebar.multiselect(
         "Actor:",
-        options=df["organizationType"].unique(),
-        default=df["organizationType"].unique()
+        options=actor_options,
+        default=actor_options
     )
     country = st.sidebar.multiselect(
         "Country:",
-        options=df["country"].unique(),
-        default=df["country"].unique()
+        options=country_options,
+        default=country_options
     )
     region = st.sidebar.multiselect(
         "Region:",
-        options=df["region"].unique(),
-        default=df["region"].unique()
+        options=region_options,
+        default=region_options
     )
 
-    return df.query(
-        "organizationType == @actor & country == @country & region == @region"
-    )
+    # Build a single boolean mask over the integer category codes; a filter left at
+    # its full default adds no predicate at all
+    mask = None
+    for column, selection, options in (
+        ('organizationType', actor, actor_options),
+        ('country', country, country_options),
+        ('region', region, region_options),
+    ):
+        if set(selection) == set(options):
+            continue
+        codes = df[column].cat.codes.to_numpy()
+        cat_to_code = {category: code for code, category in enumerate(options)}
+        # Missing values have code -1
+        cat_to_code[MISSING_VALUE_LABEL] = -1
+        selected_codes = np.fromiter(
+            (cat_to_code[value] for value in selection), dtype=codes.dtype, count=len(selection)
+        )
+        column_mask = np.isin(codes, selected_codes)
+        if mask is None:
+            mask = column_mask
+        else:
+            mask &= column_mask
+
+    selection = (tuple(sorted(actor)), tuple(sorted(country)), tuple(sorted(region)))
+
+    # Nothing narrowed: use the dataset as-is instead of copying every row
+    if mask is None:
+        return df, selection
+
+    return df[mask], selection
 
 
 def display_main_page_info():
@@ -116,20 +420,19 @@ def display_summary_statistics(df_selection):
     left_column, middle_column, right_column = st.columns(3)
 
     # Selected Actor(s)
-    current_actor = str(df_selection["organizationType"].unique()).split("[")[1].split("]")[0].split(' ')
-    new_actor = ' - '.join(actor.replace("'", "") for actor in current_actor)
+    new_actor = ' - '.join(df_selection["organizationType"].dropna().unique().tolist())
     with left_column:
         st.subheader("Selected Actor(s):")
         st.subheader(new_actor)
 
     # Total Selected Countries
-    unique_countries = df_selection["country"].nunique()
+    unique_countries = count_categories(df_selection["country"])
     with middle_column:
         st.subheader("Total Selected Countries:")
         st.subheader(f"{unique_countries}")
 
     # Total Selected Regions
-    unique_regions = df_selection["region"].nunique()
+    unique_regions = count_categories(df_selection["region"])
     with right_column:
         st.subheader("Total Selected Regions:")
         st.subheader(f"{unique_regions}")
@@ -137,76 +440,86 @@ def display_summary_statistics(df_selection):
     st.markdown("---")
 
 
-def create_pie_charts(df_selection):
+def create_pie_charts(df_selection, selection):
     """
     Create pie charts for actors, countries, and regions.
 
     Args:
         df_selection (DataFrame): Filtered dataset.
+        selection (tuple): Selection signature returned by `create_sidebar_filters`.
     """
     left_column, middle_column, right_column = st.columns([1, 2, 1])
 
+    organization_counts, country_counts, region_counts = count_values(df_selection, selection)
+
     # Actors
     with left_column:
-        st.markdown(
-            "<div style='text-align: center; font-size: 35px; font-weight: bold;'>Actors</div>",
-            unsafe_allow_html=True,
-        )
-        organization_counts = df_selection['organizationType'].value_counts()
-        organization_df = organization_counts.reset_index()
+        st.markdown(CENTERED_HEADING_HTML.format("Actors"), unsafe_allow_html=True)
+        organization_df = top_k_with_other(organization_counts).reset_index()
         organization_df.columns = ['Type', 'Count']
-        fig_organizations = px.pie(organization_df, names='Type', values='Count')
+        fig_organizations = build_pie_chart(tuple(organization_df.itertuples(index=False, name=None)))
         st.plotly_chart(fig_organizations)
 
     # Countries
     with middle_column:
-        st.markdown(
-            "<div style='text-align: center; font-size: 35px; font-weight: bold;'>Countries</div>",
-            unsafe_allow_html=True,
-        )
-        country_counts = df_selection['country'].value_counts()
-        country_df = country_counts.reset_index()
+        st.markdown(CENTERED_HEADING_HTML.format("Countries"), unsafe_allow_html=True)
+        country_counts = country_counts.rename(index=load_country_buckets(DATA_PATH))
+        country_counts = country_counts.groupby(level=0, sort=False).sum()
+        country_df = top_k_with_other(country_counts, other_label='Other countries').reset_index()
         country_df.columns = ['Type', 'Count']
-        country_df.loc[country_df['Count'] < 3000, 'Type'] = 'Other countries'
-        fig_countries = px.pie(country_df, names='Type', values='Count')
+        fig_countries = build_pie_chart(tuple(country_df.itertuples(index=False, name=None)))
         st.plotly_chart(fig_countries, key="unique_chart_key")
 
     # Regions
     with right_column:
-        st.markdown(
-            "<div style='text-align: center; font-size: 35px; font-weight: bold;'>Regions</div>",
-            unsafe_allow_html=True,
-        )
-        region_counts = df_selection['region'].value_counts()
-        region_df = region_counts.reset_index()
+        st.markdown(CENTERED_HEADING_HTML.format("Regions"), unsafe_allow_html=True)
+        region_df = top_k_with_other(region_counts).reset_index()
         region_df.columns = ['Type', 'Count']
-        fig_regions = px.pie(region_df, names='Type', values='Count')
+        fig_regions = build_pie_chart(tuple(region_df.itertuples(index=False, name=None)))
         st.plotly_chart(fig_regions, key="unique_chart_key_region")
 
 
+@st.fragment
 def display_final_table(df_selection):
     """
     Display the final table with selected dataset.
 
+    Rows are sliced into pages of `TABLE_PAGE_SIZE` on the server, so only the
+    current page is relabelled with `TABLE_COLUMN_NAMES` and sent to the browser on
+    each rerun. The table is hidden until the user asks for it, in which case it is
+    not built or sent at all.
+    Runs as a fragment, so showing the table or changing the page only reruns this
+    function and not the rest of the app.
+
     Args:
         df_selection (DataFrame): Filtered dataset.
     """
-    final_df = df_selection.rename(columns={
-        'organizationName': 'Organization Name',
-        'organizationType': 'Actor',
-        'country': 'Country',
-        'region': 'Region',
-        'dateactor': 'Date',
-        'actorProperties_businessActivity': 'Business Activity',
-        'hasCommitments': 'Commitments',
-        'hasInitiativeParticipations': 'Initiative Participations',
-        'hasActionsUndertaken': 'Actions Undertaken',
-        'hasMitigations': 'Mitigations',
-        'hasAdaptations': 'Adaptations',
-        'hasRiskAssessments': 'Risk Assessments',
-        'hasClimateActionPlans': 'Climate Action Plans'
-    })
+    # A toggle rather than st.expander: an expander still runs (and sends) its
+    # content while collapsed
+    if not st.toggle("Show data", value=False, key="show_final_table"):
+        return
+
+    if len(df_selection) == 0:
+        st.info("No rows match the current filters")
+        return
+
+    total_pages = math.ceil(len(df_selection) / TABLE_PAGE_SIZE)
+    # Narrowing the filters can leave the previously selected page out of range
+    if st.session_state.get("final_table_page", 1) > total_pages:
+        st.session_state["final_table_page"] = total_pages
+    page = st.number_input(
+        f"Page (of {total_pages}):",
+        min_value=1,
+        max_value=total_pages,
+        step=1,
+        key="final_table_page"
+    )
+    start = (page - 1) * TABLE_PAGE_SIZE
+    final_df = df_selection.iloc[start:start + TABLE_PAGE_SIZE].rename(columns=TABLE_COLUMN_NAMES)
     st.dataframe(final_df)
+    st.caption(
+        f"Showing rows {start + 1:,}–{start + len(final_df):,} of {len(df_selection):,}"
+    )
 
 
 def display_logo():
@@ -251,16 +564,16 @@ def main():
     """
     configure_page()
 
-    # Load dataset
-    df = load_data('Data UNFCCC/data_webapp.csv')
+    # Load dataset (cached across reruns and sessions)
+    df = load_data(DATA_PATH)
 
     # Sidebar filters
-    df_selection = create_sidebar_filters(df)
+    df_selection, selection = create_sidebar_filters(df)
 
     # Main page content
     display_main_page_info()
     display_summary_statistics(df_selection)
-    create_pie_charts(df_selection)
+    create_pie_charts(df_selection, selection)
     display_final_table(df_selection)
     display_logo()
 